@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+"""
+Reading three nested fields from MessagePack/CBOR messages
+
+Compares full decoding with msgpack/cbor2 against navigating the buffer in
+place with msgpack_view/cbor_view, for bytes and mmap inputs.  The views win
+when the skipped parts are large strings and blobs, which are passed over by
+length; skipping many small items runs in Python and can lose to C decoders.
+"""
+import mmap
+import os
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from coalesce import GreedyAccess, cbor_view, msgpack_view
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import cbor2
+except ImportError:
+    cbor2 = None
+
+
+def make_blob_message(n=8):
+    return {
+        'header': {'id': 12345, 'source': 'queue-7'},
+        'items': [{'sku': 'sku%d' % i, 'image': bytes(2**20),
+                   'description': 'lorem ipsum ' * 1000} for i in range(n)],
+        'meta': {'trace': {'span': 'abc123', 'parent': None}},
+    }
+
+
+def make_small_items_message(n=500):
+    return {
+        'header': {'id': 12345, 'source': 'queue-7'},
+        'items': [{'sku': 'sku%d' % i, 'qty': i, 'tags': ['a', 'b', 'c']}
+                  for i in range(n)],
+        'meta': {'trace': {'span': 'abc123', 'parent': None}},
+    }
+
+
+def read_fields(doc):
+    doc = GreedyAccess(doc)
+    return (doc['header']['id'].unbox(), doc['meta']['trace']['span'].unbox(),
+            doc['items'][3]['sku'].unbox())
+
+
+def bench(name, func, number=500):
+    secs = min(timeit.repeat(func, number=number, repeat=3)) / number
+    print("%-28s %9.1f us  %8.0f msg/s" % (name, secs * 1e6, 1 / secs))
+
+
+def main():
+    expected = (12345, 'abc123', 'sku3')
+    codecs = []
+    if msgpack is not None:
+        codecs.append(('msgpack', msgpack.packb, msgpack.unpackb,
+                       msgpack_view))
+    if cbor2 is not None:
+        codecs.append(('cbor', cbor2.dumps, cbor2.loads, cbor_view))
+    if not codecs:
+        print("Install msgpack and/or cbor2 to compare against full decoding")
+    messages = [('blobs', make_blob_message()),
+                ('small items', make_small_items_message())]
+    for kind, message in messages:
+        for name, encode, decode, view in codecs:
+            data = encode(message)
+            assert (read_fields(decode(data)) == read_fields(view(data)) ==
+                    expected)
+            print("%s, %s: %d byte message" % (name, kind, len(data)))
+            bench('full decode', lambda: read_fields(decode(data)))
+            bench('view over bytes', lambda: read_fields(view(data)))
+            with tempfile.TemporaryFile() as fh:
+                fh.write(data)
+                fh.flush()
+                buf = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+                bench('view over mmap', lambda: read_fields(view(buf)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+"""
+Stress and scaling of shared coalesce caches under a ThreadPoolExecutor
+
+Every worker mixes cached reads (Extraction, CachedAccess, dotted-path
+resolve) with occasional writes through a shared Watched document, then the
+final cached answers are checked against the raw document.  Throughput is
+reported for 1 to N threads; it only scales on a free-threaded build.
+"""
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from coalesce import CachedAccess, Extraction, Watched, flatten, resolve
+
+OPS = 20000
+
+
+def run(threads):
+    raw = {'users': {'u%d' % i: {'name': 'user%d' % i, 'visits': 0}
+                     for i in range(256)}}
+    doc = Watched(raw)
+    cached = CachedAccess(doc, maxsize=4096)
+    picks = [Extraction('users.u%d.name' % i, 'users.u%d.visits' % i)
+             for i in range(256)]
+
+    def work(n):
+        for op in range(OPS // threads):
+            i = (n * 7919 + op) % 256
+            user = 'u%d' % i
+            picks[i](doc)
+            cached['users'][user]['name'].unbox()
+            resolve(raw, 'users.%s.visits' % user)
+            if op % 100 == 0:
+                doc['users']['u%d' % (n % 256)]['visits'] = op
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        list(pool.map(work, range(threads)))
+    elapsed = time.perf_counter() - start
+
+    for i, pick in enumerate(picks):
+        user = raw['users']['u%d' % i]
+        assert pick(doc) == (user['name'], user['visits'])
+        assert cached['users']['u%d' % i]['visits'] == user['visits']
+    assert dict(flatten(doc)) == flatten(raw)
+    return OPS / elapsed
+
+
+def main():
+    gil = getattr(sys, '_is_gil_enabled', lambda: True)()
+    print("GIL enabled: %s" % gil)
+    counts = [1, 2, 4, 8, 16]
+    counts = [n for n in counts if n <= max(2, 2 * (os.cpu_count() or 1))]
+    base = None
+    for threads in counts:
+        rate = run(threads)
+        base = base or rate
+        print("%2d threads: %9.0f ops/s  (x%.2f)" % (threads, rate,
+                                                    rate / base))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+"""
+Small edit to a large Watched document versus a full rebuild
+
+Times re-flattening and re-extracting after a single leaf changes, once
+incrementally through a Watched proxy and once from scratch.  Flattening
+gains by orders of magnitude; re-extracting a couple of hundred short paths
+is only marginally faster than resolving them all again.
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from coalesce import Extraction, Watched, flatten
+
+
+def make_doc(sections=200, items=100):
+    return {'section%d' % s: {'item%d' % i: {'a': i, 'b': [s, i]}
+                              for i in range(items)}
+            for s in range(sections)}
+
+
+def main(repeat=20):
+    raw = make_doc()
+    doc = Watched(raw)
+    paths = ['section%d.item%d.a' % (s, s % 100) for s in range(200)]
+    pick = Extraction(*paths)
+    flatten(doc)
+    pick(doc)
+    print("leaves: %d, extracted paths: %d" % (len(flatten(doc)), len(paths)))
+
+    counter = iter(range(10**9))
+
+    def edit():
+        doc['section7']['item7']['a'] = next(counter)
+
+    def incremental_flatten():
+        edit()
+        flatten(doc)
+
+    def full_flatten():
+        edit()
+        flatten(raw)
+
+    def incremental_extract():
+        edit()
+        pick(doc)
+
+    def full_extract():
+        edit()
+        pick(raw)
+
+    for name, func in [('flatten, incremental', incremental_flatten),
+                       ('flatten, full rebuild', full_flatten),
+                       ('extract, incremental', incremental_extract),
+                       ('extract, full rebuild', full_extract)]:
+        secs = min(timeit.repeat(func, number=repeat, repeat=3)) / repeat
+        print("%-24s %10.1f us" % (name, secs * 1e6))
+
+
+if __name__ == "__main__":
+    main()
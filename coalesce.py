@@ -51,25 +51,217 @@ useful here):
     >>> GA(cfg).user.profile.food.unbox(say_spam, lazy=False) #doctest: +ELLIPSIS
     <function say_spam ...>
 
+Watched wraps a long-lived document and records the paths modified through
+it.  Extractions and flattened indexes built on it are then only recomputed
+beneath those paths:
+
+    >>> from coalesce import Watched, Extraction, changes, flatten
+    >>> doc = Watched({'user': {'name': 'Iggy', 'albums': ['The Idiot']}})
+    >>> pick = Extraction('user.name', 'user.albums.1', 'user.email')
+    >>> pick(doc)
+    ('Iggy', None, None)
+    >>> doc['user']['albums'].append('Lust for Life')
+    >>> doc['user']['name'] = 'Jim'
+    >>> changes(doc)
+    [('user', 'albums'), ('user', 'name')]
+    >>> pick(doc)
+    ('Jim', 'Lust for Life', None)
+    >>> sorted(flatten(doc).items())
+    [(('user', 'albums', 0), 'The Idiot'), (('user', 'albums', 1), 'Lust for Life'), (('user', 'name'), 'Jim')]
+
+diff walks two versions of a document with the same rules, so a None that
+disappears is not a change:
+
+    >>> from coalesce import diff
+    >>> v1 = {'user': {'name': 'Iggy', 'email': None}, 'tags': ['punk']}
+    >>> v2 = {'user': {'name': 'Jim'}, 'tags': ['punk', 'proto']}
+    >>> list(diff(v1, v2))
+    [(('user', 'name'), 'Iggy', 'Jim'), (('tags', 1), None, 'proto')]
+
 """
 
+import struct
+import sys
+import threading
+import weakref
 import wrapt
+import xml.etree.ElementTree as ElementTree
+from collections import OrderedDict
+from collections.abc import ItemsView, Mapping, Sequence
+from hashlib import blake2b
 from math import isnan
+from numbers import Integral
+from types import (BuiltinMethodType, MappingProxyType, MethodType,
+                   SimpleNamespace)
 
 __version__ = (0, 1, 0)
 
+
+def _nullish(value):
+    "True for None and NaN, the values treated as null in array containers"
+    if value is None:
+        return True
+    try:
+        return isnan(value)
+    except (TypeError, OverflowError):
+        return False
+
+
+def _is_null(value, sentinel):
+    "Scalar sentinel test used when mapping over array elements"
+    if _nullish(sentinel):
+        return _nullish(value)
+    try:
+        return bool(value is sentinel or value == sentinel)
+    except (TypeError, ValueError):     # An array compared elementwise
+        return False
+
+
+def _vector_types():
+    "NumPy and pandas container types, if those libraries are in use"
+    types = ()
+    np = sys.modules.get('numpy')
+    if np is not None:
+        types += (np.ndarray,)
+    pd = sys.modules.get('pandas')
+    if pd is not None:
+        types += (pd.Series, pd.DataFrame, pd.Index)
+    return types
+
+
+# A type cannot become a vector type later: subclassing ndarray needs numpy
+_vector_kinds = {}
+
+
+def _is_vector(obj):
+    kind = type(obj)
+    try:
+        return _vector_kinds[kind]
+    except KeyError:
+        found = _vector_kinds[kind] = issubclass(kind, _vector_types())
+        return found
+
+
+def _is_position(key):
+    "Integer keys index by position; anything else may name a field"
+    return isinstance(key, Integral) and not isinstance(key, bool)
+
+
+def _greedy_attr(elem, attr):
+    return getattr(elem, attr, None)
+
+
+def _greedy_item(elem, key):
+    try:
+        return elem[key]
+    except (LookupError, TypeError):
+        return None
+
+
+def _vector_field(obj, name, getter):
+    """Look up `name` across every element of an array container
+
+    Structured arrays select the named field directly; object arrays, Series
+    and Index objects apply `getter(elem, name)` as a ufunc/map.  Returns None
+    if the container holds nothing that could carry `name`.
+    """
+    names = getattr(getattr(obj, 'dtype', None), 'names', None)
+    if names and name in names:
+        return obj[name]
+    pd = sys.modules.get('pandas')
+    if pd is not None and isinstance(obj, (pd.Series, pd.Index)):
+        if obj.dtype == object:
+            return obj.map(lambda elem: getter(elem, name))
+        return None
+    np = sys.modules.get('numpy')
+    if np is not None and isinstance(obj, np.ndarray) and obj.dtype == object:
+        return np.frompyfunc(lambda elem: getter(elem, name), 1, 1)(obj)
+    return None
+
+
+def _elements_carry(obj, name):
+    """Whether `name` belongs to the elements of an array container
+
+    True for a field of a structured array, or an attribute of any element
+    of an object array, Series or Index.  Such names are mapped across the
+    elements even where the container has an attribute of its own.
+    """
+    if name[:1] == '_':
+        return False
+    dtype = getattr(obj, 'dtype', None)
+    names = getattr(dtype, 'names', None)
+    if names:
+        return name in names
+    if dtype != object:
+        return False
+    return any(hasattr(elem, name) for elem in getattr(obj, 'flat', obj))
+
+
+def null_mask(obj, sentinel=None):
+    """Boolean mask marking the null elements of a NumPy/pandas container
+
+    With a sentinel of None or NaN, both None and NaN elements are null.
+    Any other sentinel is compared elementwise.
+    """
+    if not _nullish(sentinel):
+        return obj == sentinel
+    pd = sys.modules.get('pandas')
+    if pd is not None and isinstance(obj, (pd.Series, pd.DataFrame, pd.Index)):
+        return obj.isna()
+    np = sys.modules['numpy']
+    kind = obj.dtype.kind
+    if kind in 'fc':
+        return np.isnan(obj)
+    if kind in 'mM':
+        return np.isnat(obj)
+    if kind == 'O':
+        return np.equal(obj, None) | np.not_equal(obj, obj)
+    return np.zeros(obj.shape, dtype=bool)
+
+
+def _vector_fill(obj, mask, default):
+    "Copy of `obj` with masked elements replaced by `default`"
+    pd = sys.modules.get('pandas')
+    if pd is not None and isinstance(obj, pd.Index):
+        return obj.putmask(mask, default)
+    if pd is not None and isinstance(obj, (pd.Series, pd.DataFrame)):
+        return obj.mask(mask, default)
+    out = obj.copy()
+    try:
+        out[mask] = default
+    except (TypeError, ValueError):  # Default not representable in dtype
+        out = obj.astype(object)
+        out[mask] = default
+    return out
+
+
 class GreedyAccess(wrapt.ObjectProxy):
     "Nested access casting lookup failures to None proxy"
     def __getattr__(self, attr):
+        wrapped = self.__wrapped__
+        vector = _is_vector(wrapped)
+        if vector and _elements_carry(wrapped, attr):
+            return GreedyAccess(_vector_field(wrapped, attr, _greedy_attr))
         try:
-            return GreedyAccess(getattr(self.__wrapped__, attr))
+            return GreedyAccess(getattr(wrapped, attr))
         except AttributeError:
+            if vector:
+                value = _vector_field(wrapped, attr, _greedy_attr)
+                if value is not None:
+                    return GreedyAccess(value)
             return Null
 
     def __getitem__(self, key):
         try:
             return GreedyAccess(self.__wrapped__[key])
-        except KeyError:
+        except (KeyError, IndexError, ValueError) as err:
+            if not _is_vector(self.__wrapped__):
+                if not isinstance(err, KeyError):
+                    raise
+            elif not _is_position(key):
+                value = _vector_field(self.__wrapped__, key, _greedy_item)
+                if value is not None:
+                    return GreedyAccess(value)
             return Null
 
     def __str__(self):
@@ -78,6 +270,11 @@ class GreedyAccess(wrapt.ObjectProxy):
     __repr__ = __str__
 
     def unbox(self, default=None, lazy=True):
+        if _is_vector(self.__wrapped__):
+            if lazy and callable(default):
+                default = default()
+            return _vector_fill(self.__wrapped__,
+                                null_mask(self.__wrapped__), default)
         if self.__wrapped__ is None:
             if lazy and callable(default):
                 return default()
@@ -99,33 +296,72 @@ class NullCoalesce(wrapt.ObjectProxy):
             pass
 
     def __getattr__(self, attr):
-        if self.__wrapped__ == self._sentinel:
+        wrapped = self.__wrapped__
+        if _is_vector(wrapped):
+            if _elements_carry(wrapped, attr):
+                value = _vector_field(wrapped, attr, self._elem_attr)
+                return NullCoalesce(value, sentinel=self._sentinel)
+            try:
+                value = getattr(wrapped, attr)
+            except AttributeError:
+                value = _vector_field(wrapped, attr, self._elem_attr)
+                if value is None:
+                    raise
+            return NullCoalesce(value, sentinel=self._sentinel)
+        if wrapped == self._sentinel:
             return self._sentinel
         try:
-            if isnan(self._sentinel) and isnan(self.__wrapped__):
+            if isnan(self._sentinel) and isnan(wrapped):
                 return self._sentinel
         except TypeError:  # Likely not numeric
             pass
-        return NullCoalesce(getattr(self.__wrapped__, attr),
+        return NullCoalesce(getattr(wrapped, attr),
                             sentinel=self._sentinel)
 
     def __getitem__(self, key):
-        if self.__wrapped__ == self._sentinel:
+        wrapped = self.__wrapped__
+        if _is_vector(wrapped):
+            try:
+                value = wrapped[key]
+            except (KeyError, IndexError, ValueError):
+                if _is_position(key):
+                    raise
+                value = _vector_field(wrapped, key, self._elem_item)
+                if value is None:
+                    raise
+            return NullCoalesce(value, sentinel=self._sentinel)
+        if wrapped == self._sentinel:
             return self._sentinel
         try:
-            if isnan(self._sentinel) and isnan(self.__wrapped__):
+            if isnan(self._sentinel) and isnan(wrapped):
                 return self._sentinel
         except TypeError:  # Likely not numeric
             pass
-        return NullCoalesce(self.__wrapped__[key],
+        return NullCoalesce(wrapped[key],
                             sentinel=self._sentinel)
 
+    def _elem_attr(self, elem, attr):
+        if _is_null(elem, self._sentinel):
+            return self._sentinel
+        return getattr(elem, attr)
+
+    def _elem_item(self, elem, key):
+        if _is_null(elem, self._sentinel):
+            return self._sentinel
+        return elem[key]
+
     def __str__(self):
         return "<NullCoalesce proxy for %r>" % (self.__wrapped__)
 
     __repr__ = __str__
 
     def unbox(self, default=None, lazy=True):
+        if _is_vector(self.__wrapped__):
+            if lazy and callable(default):
+                default = default()
+            return _vector_fill(self.__wrapped__,
+                                null_mask(self.__wrapped__, self._sentinel),
+                                default)
         if self.__wrapped__ is None:
             if lazy and callable(default):
                 return default()
@@ -148,6 +384,1306 @@ def unbox(obj):
         return obj
 
 
+def _unwrap(obj):
+    "Strip every layer of proxy from `obj`"
+    while isinstance(obj, wrapt.ObjectProxy):
+        obj = obj.__wrapped__
+    return obj
+
+
+_MISSING = object()     # Result of a failed lookup
+_EMPTY = object()       # Trie node holding no value
+
+_SCALARS = (str, bytes, int, float, complex, frozenset, type(None))
+_MUTATORS = frozenset([
+    'append', 'extend', 'insert', 'pop', 'remove', 'clear', 'sort',
+    'reverse', 'update', 'setdefault', 'popitem', 'add', 'discard',
+    'difference_update', 'intersection_update', 'symmetric_difference_update',
+])
+
+
+def parse_path(path):
+    """Compile a path into a tuple of lookup steps
+
+    A path is either a sequence of steps or a dotted string whose all-digit
+    segments become integer indices, e.g. 'user.albums.0.title'.
+    """
+    if isinstance(path, str):
+        return _parse_dotted(path)
+    return tuple(path)
+
+
+def _compile_dotted(path):
+    if not path:
+        return ()
+    return tuple(int(seg) if seg.isdigit() else seg
+                 for seg in path.split('.'))
+
+
+class _CompiledPaths(object):
+    """Cache of dotted path strings compiled to step tuples
+
+    Each thread reads from its own front dict without locking; the shared
+    dict behind it is only locked to add a newly compiled path.
+    """
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.shared = {}
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    def __call__(self, path):
+        try:
+            front = self.local.front
+        except AttributeError:
+            front = self.local.front = {}
+        steps = front.get(path)
+        if steps is None:
+            steps = self.shared.get(path)
+            if steps is None:
+                steps = _compile_dotted(path)
+                with self.lock:
+                    if len(self.shared) >= self.maxsize:
+                        self.shared.clear()
+                    steps = self.shared.setdefault(path, steps)
+            if len(front) >= self.maxsize:
+                front.clear()
+            front[path] = steps
+        return steps
+
+
+_parse_dotted = _CompiledPaths()
+
+
+def _step(obj, step):
+    "One lookup step, trying item then attribute access"
+    try:
+        return obj[step]
+    except (LookupError, TypeError):
+        pass
+    if isinstance(step, str):
+        try:
+            return getattr(obj, step)
+        except AttributeError:
+            pass
+    return _MISSING
+
+
+def _lookup(obj, steps):
+    for step in steps:
+        obj = _step(obj, step)
+        if obj is _MISSING:
+            break
+    return obj
+
+
+def resolve(obj, path, default=None):
+    """Follow `path` into `obj` the way GreedyAccess would
+
+    Missing steps and None values both produce `default`.
+    """
+    value = _lookup(_unwrap(obj), parse_path(path))
+    if value is _MISSING or value is None:
+        return default
+    return value
+
+
+def _children(obj):
+    "Iterable of (step, child) pairs for a container, or None for a leaf"
+    if isinstance(obj, Mapping):
+        return obj.items()
+    if isinstance(obj, (list, tuple, PackedArray)):
+        return enumerate(obj)
+    if isinstance(obj, SimpleNamespace):
+        return vars(obj).items()
+    return None
+
+
+def _walk(path, obj):
+    "Yield (path, leaf) pairs beneath `obj`, in document order"
+    stack = [(path, obj)]
+    while stack:
+        path, obj = stack.pop()
+        children = _children(obj)
+        if children is None:
+            yield path, obj
+        else:
+            stack.extend(reversed([(path + (step,), child)
+                                   for step, child in children]))
+
+
+class _PathTrie(object):
+    "Values keyed by path tuples, so whole subtrees can be dropped at once"
+    __slots__ = ('value', 'children')
+
+    def __init__(self):
+        self.value = _EMPTY
+        self.children = {}
+
+    def get(self, path, default=None):
+        node = self
+        for step in path:
+            node = node.children.get(step)
+            if node is None:
+                return default
+        return default if node.value is _EMPTY else node.value
+
+    def set(self, path, value):
+        node = self
+        for step in path:
+            child = node.children.get(step)
+            if child is None:
+                child = node.children[step] = _PathTrie()
+            node = child
+        node.value = value
+
+    def pop(self, path):
+        "Detach and return the node at `path` with all its descendants"
+        if not path:
+            node = _PathTrie()
+            node.value, node.children = self.value, self.children
+            self.value, self.children = _EMPTY, {}
+            return node
+        parent = self
+        for step in path[:-1]:
+            parent = parent.children.get(step)
+            if parent is None:
+                return None
+        return parent.children.pop(path[-1], None)
+
+    def items(self, prefix=()):
+        stack = [(prefix, self)]
+        while stack:
+            path, node = stack.pop()
+            if node.value is not _EMPTY:
+                yield path, node.value
+            stack.extend((path + (step,), child)
+                         for step, child in node.children.items())
+
+
+class _FlatIndex(object):
+    "Leaf values of a document keyed by path, rebuilt only where dirty"
+
+    def __init__(self, root):
+        self.leaves = {}
+        self.paths = _PathTrie()
+        self.dirty = []
+        self._add((), root)
+
+    def _add(self, path, obj):
+        for leaf_path, leaf in _walk(path, obj):
+            self.leaves[leaf_path] = leaf
+            self.paths.set(leaf_path, True)
+
+    def invalidate(self, path):
+        self.dirty.append(path)
+
+    def refresh(self, root):
+        dirty, self.dirty = self.dirty, []
+        for path in dirty:
+            for depth in range(len(path)):
+                if path[:depth] in self.leaves:
+                    path = path[:depth]     # Written beneath an opaque leaf
+                    break
+            node = self.paths.pop(path)
+            if node is not None:
+                for leaf_path, _ in node.items(path):
+                    del self.leaves[leaf_path]
+            obj = _lookup(root, path)
+            if obj is not _MISSING:
+                self._add(path, obj)
+
+
+class _Journal(object):
+    """Changes recorded through a Watched document, and the caches they affect
+
+    Cached results are read without locking.  Writers hold `lock`, and a
+    value computed by a reader is only stored if `version` has not moved
+    since it started, so a result from before a change cannot outlive it.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.changes = {}
+        self.results = _PathTrie()
+        self.extractions = weakref.WeakKeyDictionary()
+        self.hashes = _MerkleCache()
+        self.index = None
+        self.listeners = weakref.WeakSet()
+        self.lock = threading.Lock()
+        self.version = 0
+
+    def record(self, path):
+        "Invalidate everything cached at or beneath `path`"
+        with self.lock:
+            self.version += 1
+            self.changes[path] = None
+            self.results.pop(path)
+            self.hashes.forget(self.root, path)
+            for extraction in [e for e in self.extractions
+                               if e.depends_on(path)]:
+                del self.extractions[extraction]
+            if self.index is not None:
+                self.index.invalidate(path)
+            for listener in list(self.listeners):
+                listener.invalidate(path)
+
+    def store(self, version, path, value):
+        with self.lock:
+            if self.version == version:
+                self.results.set(path, value)
+
+
+def _journal_of(obj):
+    "The journal and path of a (possibly re-wrapped) Watched proxy"
+    while not isinstance(obj, Watched):
+        if not isinstance(obj, wrapt.ObjectProxy):
+            return None, ()
+        obj = obj.__wrapped__
+    return obj._self_journal, obj._self_path
+
+
+class Watched(wrapt.ObjectProxy):
+    """Write-through proxy recording which paths are modified beneath it
+
+    Children reached by item or attribute access, iteration over a
+    sequence, and a mapping's get(), setdefault(), items() and values()
+    are Watched in turn.  Values returned by pop() and popitem() are no
+    longer part of the document and come back unwrapped, as do slices,
+    which are copies.  Changes made through any other reference must be
+    recorded with touch().
+    """
+    def __init__(self, obj, _path=(), _journal=None):
+        super(Watched, self).__init__(obj)
+        self._self_path = _path
+        self._self_journal = _journal if _journal is not None else _Journal(obj)
+
+    def _child(self, step, value):
+        if isinstance(value, _SCALARS):
+            return value
+        return Watched(value, self._self_path + (step,), self._self_journal)
+
+    def _record(self, step=_MISSING):
+        if step is _MISSING or isinstance(step, slice):
+            self._self_journal.record(self._self_path)
+        else:
+            self._self_journal.record(self._self_path + (step,))
+
+    def __getattr__(self, attr):
+        value = getattr(self.__wrapped__, attr)
+        if isinstance(value, (MethodType, BuiltinMethodType)):
+            if attr in ('get', 'items', 'values') and \
+                    isinstance(self.__wrapped__, Mapping):
+                return getattr(self, '_' + attr)
+            if attr not in _MUTATORS:
+                return value
+            record, child = self._record, self._child
+
+            def mutate(*args, **kwargs):
+                result = value(*args, **kwargs)
+                record()
+                if attr == 'setdefault':
+                    return child(args[0], result)
+                return result
+            return mutate
+        return self._child(attr, value)
+
+    def _get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def _items(self):
+        return [(key, self._child(key, value))
+                for key, value in self.__wrapped__.items()]
+
+    def _values(self):
+        return [child for _, child in self._items()]
+
+    def __iter__(self):
+        wrapped = self.__wrapped__
+        if _is_sequence(wrapped):
+            return (self._child(index, value)
+                    for index, value in enumerate(wrapped))
+        return iter(wrapped)
+
+    def __setattr__(self, name, value):
+        if name.startswith('_self_') or name == '__wrapped__':
+            super(Watched, self).__setattr__(name, value)
+        else:
+            setattr(self.__wrapped__, name, _unwrap(value))
+            self._record(name)
+
+    def __delattr__(self, name):
+        delattr(self.__wrapped__, name)
+        self._record(name)
+
+    def _position(self, key):
+        "The step a sequence index names, counting negative ones from 0"
+        if _is_position(key) and key < 0 and \
+                isinstance(self.__wrapped__, Sequence):
+            return key + len(self.__wrapped__)
+        return key
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return self.__wrapped__[key]    # A copy, not part of the document
+        return self._child(self._position(key), self.__wrapped__[key])
+
+    def __setitem__(self, key, value):
+        step = self._position(key)
+        self.__wrapped__[key] = _unwrap(value)
+        self._record(step)
+
+    def __delitem__(self, key):
+        del self.__wrapped__[key]
+        if isinstance(self.__wrapped__, Sequence):
+            self._record()  # Later items shift down, like pop()
+        else:
+            self._record(key)
+
+    def __str__(self):
+        return "<Watched proxy for %r>" % (self.__wrapped__,)
+
+    __repr__ = __str__
+
+
+def touch(doc, path=()):
+    "Record a modification to a Watched document made without its proxy"
+    journal, base = _journal_of(doc)
+    if journal is None:
+        raise TypeError("touch() needs a Watched document, not %s"
+                        % type(doc).__name__)
+    journal.record(base + parse_path(path))
+
+
+def changes(doc):
+    "Paths modified beneath a Watched document since the last call"
+    journal, _ = _journal_of(doc)
+    if journal is None:
+        raise TypeError("changes() needs a Watched document, not %s"
+                        % type(doc).__name__)
+    with journal.lock:
+        changed = list(journal.changes)
+        journal.changes.clear()
+    return changed
+
+
+def flatten(doc):
+    """Mapping of path tuples to every leaf value beneath `doc`
+
+    For a Watched document the index lives with the document, and later
+    calls only re-walk the subtrees beneath modified paths.  That index is
+    returned as a live read-only view.
+    """
+    journal, base = _journal_of(doc)
+    if journal is None or base:
+        return dict(_walk((), _unwrap(doc)))
+    with journal.lock:
+        if journal.index is None:
+            journal.index = _FlatIndex(journal.root)
+        journal.index.refresh(journal.root)
+        return MappingProxyType(journal.index.leaves)
+
+
+class Extraction(object):
+    """Several paths compiled once and resolved together
+
+    Applied to a Watched document, resolved values are cached and a change
+    only recomputes the paths at or beneath it.
+    """
+    def __init__(self, *paths, default=None):
+        self.paths = tuple(parse_path(path) for path in paths)
+        self.default = default
+
+    def depends_on(self, path):
+        depth = len(path)
+        return any(steps[:depth] == path for steps in self.paths)
+
+    def _finish(self, value):
+        if value is _MISSING or value is None:
+            return self.default
+        return value
+
+    def __call__(self, doc):
+        journal, base = _journal_of(doc)
+        if journal is None:
+            doc = _unwrap(doc)
+            return tuple(self._finish(_lookup(doc, steps))
+                         for steps in self.paths)
+        if not base:
+            values = journal.extractions.get(self)
+            if values is not None:
+                return values
+        version = journal.version
+        values = []
+        for steps in self.paths:
+            steps = base + steps
+            value = journal.results.get(steps, _EMPTY)
+            if value is _EMPTY:
+                value = _lookup(journal.root, steps)
+                journal.store(version, steps, value)
+            values.append(self._finish(value))
+        values = tuple(values)
+        if not base:
+            with journal.lock:
+                if journal.version == version:
+                    journal.extractions[self] = values
+        return values
+
+    def __repr__(self):
+        return "Extraction(%s)" % ', '.join(
+            repr('.'.join(map(str, steps))) for steps in self.paths)
+
+
+class _ProxyCache(object):
+    """Bounded LRU of the child proxies created beneath one CachedAccess root
+
+    Entries are striped by key hash over several independently locked LRUs,
+    so threads sharing a root rarely wait on each other.  Proxies are built
+    outside the locks; one computed across an invalidation is not stored.
+    """
+    stripes = 8
+
+    def __init__(self, maxsize, base=()):
+        stripes = max(1, min(self.stripes, maxsize))
+        self.shard_size = maxsize // stripes
+        self.shards = [(threading.Lock(), OrderedDict())
+                       for _ in range(stripes)]
+        self.base = base
+        self.lock = threading.Lock()
+        self.version = 0
+
+    def __len__(self):
+        return sum(len(entries) for _, entries in self.shards)
+
+    def lookup(self, key, compute):
+        lock, entries = self.shards[hash(key) % len(self.shards)]
+        with lock:
+            proxy = entries.get(key, _MISSING)
+            if proxy is not _MISSING:
+                entries.move_to_end(key)
+                return proxy
+            version = self.version
+        proxy = compute()
+        if not self.shard_size:
+            return proxy
+        with lock:
+            if self.version == version:
+                entries[key] = proxy
+                if len(entries) > self.shard_size:
+                    entries.popitem(last=False)
+        return proxy
+
+    def _drop(self, stale):
+        with self.lock:
+            self.version += 1
+        for lock, entries in self.shards:
+            with lock:
+                for key in [key for key in entries if stale(key)]:
+                    del entries[key]
+
+    def clear(self):
+        self._drop(lambda key: True)
+
+    def invalidate(self, path):
+        "Drop entries at or beneath `path`, given from the Watched root"
+        depth = len(self.base)
+        if path[:depth] != self.base:
+            if self.base[:len(path)] == path:
+                self.clear()
+            return
+        path = path[depth:]
+        depth = len(path)
+        self._drop(lambda key: len(key) >= depth and all(
+            _step_matches(step, want) for (_, step), want in zip(key, path)))
+
+
+def _step_matches(step, want):
+    "Compare a cached step with a parsed one, where '0' was parsed as 0"
+    return step == want or (type(want) is int and step == str(want))
+
+
+class CachedAccess(GreedyAccess):
+    """GreedyAccess that memoizes every child proxy, including Null results
+
+    Child proxies are cached per attribute and key in an LRU shared by the
+    whole tree below one root and bounded by `maxsize`.  Wrapping a Watched
+    document keeps the cache in step with changes made through it.
+    """
+    def __init__(self, obj, maxsize=1024, _cache=None, _path=()):
+        super(CachedAccess, self).__init__(obj)
+        if _cache is None:
+            journal, base = _journal_of(obj)
+            _cache = _ProxyCache(maxsize, base)
+            if journal is not None:
+                journal.listeners.add(_cache)
+        self._self_cache = _cache
+        self._self_path = _path
+
+    def _adopt(self, key, found):
+        if found is Null:
+            return Null
+        return CachedAccess(found.__wrapped__, _cache=self._self_cache,
+                            _path=key)
+
+    def __getattr__(self, attr):
+        key = self._self_path + (('.', attr),)
+        return self._self_cache.lookup(key, lambda: self._adopt(
+            key, GreedyAccess.__getattr__(self, attr)))
+
+    def __getitem__(self, key):
+        path = self._self_path + (('[]', key),)
+        try:
+            hash(path)
+        except TypeError:   # Unhashable key, such as a slice
+            return GreedyAccess.__getitem__(self, key)
+        return self._self_cache.lookup(path, lambda: self._adopt(
+            path, GreedyAccess.__getitem__(self, key)))
+
+    def __str__(self):
+        return "<CachedAccess proxy for %r>" % (self.__wrapped__,)
+
+    __repr__ = __str__
+
+    def refresh(self):
+        "Forget every cached proxy beneath this one"
+        if self._self_path:
+            self.invalidate(())
+        else:
+            self._self_cache.clear()
+
+    def invalidate(self, path):
+        "Forget cached proxies at or beneath `path`, relative to this proxy"
+        cache = self._self_cache
+        steps = tuple(step for _, step in self._self_path)
+        cache.invalidate(cache.base + steps + parse_path(path))
+
+
+class _MerkleCache(object):
+    """Subtree hashes keyed by container identity
+
+    Entries pin their container so an id cannot be reused while cached.
+    A diff uses a fresh cache unless a side is Watched, whose journal keeps
+    one for the life of the document and forgets the containers along each
+    recorded path.  Each diff then starts a new generation, keeping only the
+    hashes of the previous call that are looked up again.  Tables are
+    striped by id, each stripe with its own lock for writes, so concurrent
+    diffs do not serialize on one dict.  `epoch` moves on every forget, and
+    is checked under the stripe lock, so a hash computed across a mutation
+    is never stored.
+    """
+    stripes = 16
+
+    def __init__(self):
+        self.epoch = 0
+        self.lock = threading.Lock()
+        self.locks = [threading.Lock() for _ in range(self.stripes)]
+        self.previous, self.current = self._tables(), self._tables()
+
+    def _tables(self):
+        return [{} for _ in range(self.stripes)]
+
+    def get(self, obj):
+        key = id(obj)
+        slot = (key >> 4) % self.stripes
+        entry = self.current[slot].get(key)
+        if entry is None:
+            with self.locks[slot]:  # Never promote past a concurrent forget
+                entry = self.previous[slot].get(key)
+                if entry is None or entry[0] is not obj:
+                    return None
+                self.current[slot][key] = entry
+        return entry[1] if entry[0] is obj else None
+
+    def put(self, obj, value, epoch):
+        key = id(obj)
+        slot = (key >> 4) % self.stripes
+        with self.locks[slot]:
+            if epoch == self.epoch:
+                self.current[slot][key] = (obj, value)
+
+    def _advance(self):
+        with self.lock:
+            self.epoch += 1
+
+    def forget(self, root, path):
+        "Drop the hashes of the containers from `root` down to `path`"
+        self._advance()
+        obj = root
+        for step in (_MISSING,) + path:
+            if step is not _MISSING:
+                obj = _step(obj, step)
+                if obj is _MISSING:
+                    break
+            key = id(obj)
+            slot = (key >> 4) % self.stripes
+            with self.locks[slot]:
+                for tables in (self.current, self.previous):
+                    tables[slot].pop(key, None)  # Pinned, so only obj has key
+
+    def rotate(self):
+        self.previous, self.current = self.current, self._tables()
+
+
+def _is_sequence(obj):
+    return isinstance(obj, (list, tuple, PackedArray))
+
+
+def _leaf_hash(value):
+    """Digest of a leaf, equal for leaves of one type and equal value
+
+    Strings, bytes and numbers (subclasses included) are digested by value,
+    all NaNs alike; any other leaf by identity, so that equal digests can
+    stand for equal leaves without comparing them.
+    """
+    kind = type(value)
+    if value is None:
+        data = b''
+    elif isinstance(value, str):
+        data = value.encode('utf-8', 'surrogatepass')
+    elif isinstance(value, (bytes, bytearray)):
+        data = bytes(value)
+    elif isinstance(value, int):
+        data = b'%d' % value
+    elif isinstance(value, float):
+        data = float.hex(value).encode()
+    elif isinstance(value, complex):
+        data = b'%s,%s' % (float.hex(value.real).encode(),
+                           float.hex(value.imag).encode())
+    else:
+        kind, data = None, b'%d' % id(value)
+    name = b'id' if kind is None else \
+        ('%s.%s' % (kind.__module__, kind.__qualname__)).encode()
+    return blake2b(name + b'\0' + data, digest_size=16).digest()
+
+
+def _tree_hash(obj, cache):
+    "Merkle digest of a subtree: its leaves, and for maps their keys"
+    value = cache.get(obj)
+    if value is not None:
+        return value
+    epoch = cache.epoch
+    children = _children(obj)
+    if children is None:
+        return _leaf_hash(obj)
+    if _is_sequence(obj):
+        digest = blake2b(b'seq', digest_size=16)
+        for _, child in children:
+            digest.update(_tree_hash(child, cache))
+    else:
+        digest = blake2b(b'map', digest_size=16)
+        for entry in sorted(_leaf_hash(step) + _tree_hash(child, cache)
+                            for step, child in children):
+            digest.update(entry)
+    value = digest.digest()
+    cache.put(obj, value, epoch)
+    return value
+
+
+def _same_array(old, new):
+    "Compare leaves whose == is elementwise, such as NumPy arrays"
+    equals = getattr(old, 'equals', None)     # pandas
+    if equals is not None:
+        return bool(equals(new))
+    np = sys.modules.get('numpy')
+    if np is None:
+        return False
+    try:
+        return bool(np.array_equal(old, new, equal_nan=True))
+    except TypeError:   # NaN test unsupported for the dtype
+        return bool(np.array_equal(old, new))
+
+
+def _same_leaf(old, new):
+    if old is new:
+        return True
+    if type(old) is not type(new):
+        return False
+    try:
+        return bool(old == new or (old != old and new != new))
+    except (TypeError, ValueError):
+        return _same_array(old, new)
+
+
+def _diff(path, old, new, sentinel, caches):
+    if old is new:
+        return
+    old_null = old is _MISSING or _is_null(old, sentinel)
+    new_null = new is _MISSING or _is_null(new, sentinel)
+    if old_null or new_null:
+        if not (old_null and new_null):
+            yield (path, sentinel if old_null else old,
+                   sentinel if new_null else new)
+        return
+    old_children, new_children = _children(old), _children(new)
+    if (old_children is None or new_children is None or
+            _is_sequence(old) != _is_sequence(new)):
+        if not _same_leaf(old, new):
+            yield path, old, new
+        return
+    if _tree_hash(old, caches[0]) == _tree_hash(new, caches[1]):
+        return
+    old_children, new_children = dict(old_children), dict(new_children)
+    for step, child in old_children.items():
+        for change in _diff(path + (step,), child,
+                            new_children.get(step, _MISSING), sentinel,
+                            caches):
+            yield change
+    for step, child in new_children.items():
+        if step not in old_children:
+            for change in _diff(path + (step,), _MISSING, child,
+                                sentinel, caches):
+                yield change
+
+
+def diff(old, new, sentinel=None):
+    """Lazily yield (path, old, new) for each difference between documents
+
+    Missing paths and null values (None or NaN, or else `sentinel`) compare
+    equal, as they do under GreedyAccess and NullCoalesce, and either is
+    reported as `sentinel`.  Equal subtrees are found by their Merkle
+    digests (blake2b) and skipped without being walked.  Digests are only
+    kept from one call to the next for Watched documents, whose writes drop
+    the stale ones.
+    """
+    caches, fresh = [], None
+    for doc in (old, new):
+        journal, _ = _journal_of(doc)
+        if journal is None:
+            fresh = fresh or _MerkleCache()
+            caches.append(fresh)
+        else:
+            if journal.hashes not in caches:
+                journal.hashes.rotate()
+            caches.append(journal.hashes)
+    return _diff((), _unwrap(old), _unwrap(new), sentinel, caches)
+
+
+# Each codec reads the head of an item as a (tag, size, pos) triple: 'map'
+# and 'array' carry an entry count, 'str', 'bin' and 'ext' a payload length,
+# and 'imm' the decoded value itself.  `pos` follows the head, and a size of
+# None marks a CBOR indefinite-length item, closed by a 'break'.  Each codec
+# also has a skipper returning the position just past a whole item, found
+# from length headers alone.
+
+_U8, _U16, _U32, _U64 = (struct.Struct(fmt) for fmt in '>B >H >I >Q'.split())
+
+_MSGPACK_HEADS = {
+    0xc4: ('bin', _U8), 0xc5: ('bin', _U16), 0xc6: ('bin', _U32),
+    0xca: ('imm', struct.Struct('>f')), 0xcb: ('imm', struct.Struct('>d')),
+    0xcc: ('imm', _U8), 0xcd: ('imm', _U16),
+    0xce: ('imm', _U32), 0xcf: ('imm', _U64),
+    0xd0: ('imm', struct.Struct('>b')), 0xd1: ('imm', struct.Struct('>h')),
+    0xd2: ('imm', struct.Struct('>i')), 0xd3: ('imm', struct.Struct('>q')),
+    0xd9: ('str', _U8), 0xda: ('str', _U16), 0xdb: ('str', _U32),
+    0xdc: ('array', _U16), 0xdd: ('array', _U32),
+    0xde: ('map', _U16), 0xdf: ('map', _U32),
+}
+_MSGPACK_EXT = {0xc7: _U8, 0xc8: _U16, 0xc9: _U32}
+_MSGPACK_FIXEXT = {0xd4: 1, 0xd5: 2, 0xd6: 4, 0xd7: 8, 0xd8: 16}
+_MSGPACK_CONSTANTS = {0xc0: None, 0xc2: False, 0xc3: True}
+
+# For skipping, bytes 0xc0-0xdf map to (fixed bytes after the head byte,
+# length prefix or None, items added per unit of length)
+_MSGPACK_SKIPS = dict(
+    [(byte, (0, None, 0)) for byte in _MSGPACK_CONSTANTS] +
+    [(byte, (size + 1, None, 0)) for byte, size in _MSGPACK_FIXEXT.items()] +
+    [(byte, (fmt.size + 1, fmt, 0)) for byte, fmt in _MSGPACK_EXT.items()] +
+    [(byte, (fmt.size, None, 0)) for byte, (tag, fmt) in _MSGPACK_HEADS.items()
+     if tag == 'imm'] +
+    [(byte, (fmt.size, fmt, {'map': 2, 'array': 1}.get(tag, 0)))
+     for byte, (tag, fmt) in _MSGPACK_HEADS.items() if tag != 'imm'])
+
+
+def _msgpack_head(buf, pos):
+    byte = buf[pos]
+    pos += 1
+    if byte <= 0x7f:
+        return 'imm', byte, pos
+    if byte >= 0xe0:
+        return 'imm', byte - 0x100, pos
+    if byte <= 0x8f:
+        return 'map', byte & 0x0f, pos
+    if byte <= 0x9f:
+        return 'array', byte & 0x0f, pos
+    if byte <= 0xbf:
+        return 'str', byte & 0x1f, pos
+    if byte in _MSGPACK_HEADS:
+        tag, fmt = _MSGPACK_HEADS[byte]
+        return tag, fmt.unpack_from(buf, pos)[0], pos + fmt.size
+    if byte in _MSGPACK_CONSTANTS:
+        return 'imm', _MSGPACK_CONSTANTS[byte], pos
+    if byte in _MSGPACK_FIXEXT:     # Sizes count the leading type byte
+        return 'ext', _MSGPACK_FIXEXT[byte] + 1, pos
+    if byte in _MSGPACK_EXT:
+        fmt = _MSGPACK_EXT[byte]
+        return 'ext', fmt.unpack_from(buf, pos)[0] + 1, pos + fmt.size
+    raise ValueError("Invalid MessagePack byte 0x%02x at %d" % (byte, pos - 1))
+
+
+def _msgpack_skip(buf, pos):
+    pending = 1
+    skips = _MSGPACK_SKIPS
+    while pending:
+        pending -= 1
+        byte = buf[pos]
+        pos += 1
+        if byte <= 0x7f or byte >= 0xe0:
+            continue
+        if byte <= 0x8f:
+            pending += 2 * (byte & 0x0f)
+        elif byte <= 0x9f:
+            pending += byte & 0x0f
+        elif byte <= 0xbf:
+            pos += byte & 0x1f
+        else:
+            try:
+                fixed, fmt, items = skips[byte]
+            except KeyError:
+                raise ValueError("Invalid MessagePack byte 0x%02x at %d"
+                                 % (byte, pos - 1))
+            if fmt is None:
+                pos += fixed
+            elif items:
+                pending += items * fmt.unpack_from(buf, pos)[0]
+                pos += fixed
+            else:
+                pos += fixed + fmt.unpack_from(buf, pos)[0]
+    return pos
+
+
+_CBOR_ARGS = {24: _U8, 25: _U16, 26: _U32, 27: _U64}
+_CBOR_FLOATS = {25: struct.Struct('>e'), 26: struct.Struct('>f'),
+                27: struct.Struct('>d')}
+_CBOR_SIMPLE = {20: False, 21: True, 22: None, 23: None}
+_CBOR_BIGNUMS = (2, 3)        # Tags for positive and negative bignums
+_CBOR_MAJORS = {2: 'bin', 3: 'str', 4: 'array', 5: 'map', 6: 'tag'}
+
+
+def _cbor_head(buf, pos):
+    byte = buf[pos]
+    pos += 1
+    major, info = byte >> 5, byte & 0x1f
+    if major == 7:
+        if info in _CBOR_FLOATS:
+            fmt = _CBOR_FLOATS[info]
+            return 'imm', fmt.unpack_from(buf, pos)[0], pos + fmt.size
+        if info == 31:
+            return 'break', None, pos
+        if info == 24:
+            info, pos = buf[pos], pos + 1
+            if info < 32:
+                raise ValueError("Invalid CBOR simple value %d at %d"
+                                 % (info, pos - 2))
+        elif info >= 28:
+            raise ValueError("Invalid CBOR byte 0x%02x at %d"
+                             % (byte, pos - 1))
+        return 'imm', _CBOR_SIMPLE.get(info, info), pos
+    if info < 24:
+        arg = info
+    elif info in _CBOR_ARGS:
+        fmt = _CBOR_ARGS[info]
+        arg, pos = fmt.unpack_from(buf, pos)[0], pos + fmt.size
+    elif info == 31 and 2 <= major <= 5:
+        arg = None
+    else:
+        raise ValueError("Invalid CBOR byte 0x%02x at %d" % (byte, pos - 1))
+    if major == 0:
+        return 'imm', arg, pos
+    if major == 1:
+        return 'imm', -1 - arg, pos
+    return _CBOR_MAJORS[major], arg, pos
+
+
+def _cbor_skip(buf, pos):
+    counts = [1]    # Items left in each open container, None if indefinite
+    args = _CBOR_ARGS
+    while counts:
+        left = counts[-1]
+        if left == 0:
+            counts.pop()
+            continue
+        byte = buf[pos]
+        pos += 1
+        if byte == 0xff:
+            counts.pop()
+            continue
+        major, arg = byte >> 5, byte & 0x1f
+        if arg >= 24:
+            if arg == 31:
+                arg = None
+            elif arg in args:
+                fmt = args[arg]
+                arg, pos = fmt.unpack_from(buf, pos)[0], pos + fmt.size
+            else:
+                raise ValueError("Invalid CBOR byte 0x%02x at %d"
+                                 % (byte, pos - 1))
+        if major == 6:      # A tag qualifies the item after it
+            continue
+        if left is not None:
+            counts[-1] = left - 1
+        if major <= 1 or major == 7:
+            continue
+        if arg is None:
+            counts.append(None)
+        elif major <= 3:
+            pos += arg
+        else:
+            counts.append(arg if major == 4 else 2 * arg)
+    return pos
+
+
+_MSGPACK = (_msgpack_head, _msgpack_skip)
+_CBOR = (_cbor_head, _cbor_skip)
+
+
+def _decode(codec, buf, pos):
+    "Decode the leaf at `pos`, or wrap a map or array there as a node"
+    head = codec[0]
+    tag, size, pos = head(buf, pos)
+    number = None
+    while tag == 'tag':         # Only CBOR bignums are decoded, others dropped
+        number = size
+        tag, size, pos = head(buf, pos)
+    if tag == 'imm':
+        return size
+    if tag == 'map':
+        return PackedMap(codec, buf, pos, size)
+    if tag == 'array':
+        return PackedArray(codec, buf, pos, size)
+    if size is None:            # Indefinite CBOR string, sent in chunks
+        chunks = []
+        while buf[pos] != 0xff:
+            _, size, pos = head(buf, pos)
+            chunks.append(buf[pos:pos + size])
+            pos += size
+        data = b''.join(chunks)
+        if tag == 'str':
+            return data.decode('utf-8')
+    else:
+        data = buf[pos:pos + size]
+        if tag == 'str':
+            return str(data, 'utf-8')
+        if tag == 'ext':
+            return struct.unpack_from('b', data)[0], data[1:]
+    if tag == 'bin' and number in _CBOR_BIGNUMS:
+        value = int.from_bytes(data, 'big')
+        return value if number == 2 else -1 - value
+    return data
+
+
+class _Packed(object):
+    "Container inside a MessagePack or CBOR buffer, read in place"
+    __slots__ = ('_codec', '_buf', '_pos', '_size')
+
+    def __init__(self, codec, buf, pos, size):
+        self._codec = codec
+        self._buf = buf
+        self._pos = pos
+        self._size = size
+
+    def _more(self, pos, done):
+        "Whether another entry starts at `pos` after `done` entries"
+        if self._size is None:
+            return self._buf[pos] != 0xff
+        return done < self._size
+
+
+class PackedMap(_Packed, Mapping):
+    """MessagePack or CBOR map read in place from its buffer
+
+    Lookups scan entry headers, skipping unneeded values by their lengths,
+    and decode only the value found.  Attribute access falls back to keys,
+    so GreedyAccess and NullCoalesce navigate it like a namespace.
+    """
+    __slots__ = ()
+
+    def _entries(self):
+        "(key_pos, value_pos) of each entry"
+        skip = self._codec[1]
+        buf, pos, done = self._buf, self._pos, 0
+        while self._more(pos, done):
+            value_pos = skip(buf, pos)
+            yield pos, value_pos
+            pos = skip(buf, value_pos)
+            done += 1
+
+    def __getitem__(self, key):
+        codec, buf = self._codec, self._buf
+        head, skip = codec
+        target = key.encode('utf-8') if isinstance(key, str) else None
+        pos, done = self._pos, 0
+        while self._more(pos, done):
+            tag, size, value_pos = head(buf, pos)
+            if tag == 'str' and size is not None:
+                value_pos += size
+                if (target is not None and size == len(target) and
+                        buf[value_pos - size:value_pos] == target):
+                    return _decode(codec, buf, value_pos)
+            else:
+                value_pos = skip(buf, pos)
+                if _decode(codec, buf, pos) == key:
+                    return _decode(codec, buf, value_pos)
+            pos = skip(buf, value_pos)
+            done += 1
+        raise KeyError(key)
+
+    def __getattr__(self, name):
+        if name[:2] == '__':     # Only dunders; keys like _id are fine
+            raise AttributeError(name)
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def __iter__(self):
+        for key_pos, _ in self._entries():
+            yield _decode(self._codec, self._buf, key_pos)
+
+    def __len__(self):
+        if self._size is None:
+            return sum(1 for _ in self._entries())
+        return self._size
+
+    def items(self):
+        return _PackedItems(self)
+
+    def __repr__(self):
+        return "<PackedMap of %d entries>" % len(self)
+
+
+class _PackedItems(ItemsView):
+    "Items of a PackedMap, decoded in a single pass"
+
+    def __iter__(self):
+        packed = self._mapping
+        codec, buf = packed._codec, packed._buf
+        for key_pos, value_pos in packed._entries():
+            yield _decode(codec, buf, key_pos), _decode(codec, buf, value_pos)
+
+
+class PackedArray(_Packed, Sequence):
+    """MessagePack or CBOR array read in place from its buffer
+
+    Item offsets are found lazily from length headers, and only as far as
+    the highest index requested.
+    """
+    __slots__ = ('_offsets',)
+
+    def __init__(self, codec, buf, pos, size):
+        super(PackedArray, self).__init__(codec, buf, pos, size)
+        self._offsets = [pos]
+
+    def _offset(self, index):
+        "Position of item `index`, or None past the end"
+        offsets, skip, buf = self._offsets, self._codec[1], self._buf
+        while len(offsets) <= index + 1:
+            pos = offsets[-1]
+            if not self._more(pos, len(offsets) - 1):
+                break
+            offsets.append(skip(buf, pos))
+        if index + 1 < len(offsets):
+            return offsets[index]
+        return None
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        pos = self._offset(index) if index >= 0 else None
+        if pos is None:
+            raise IndexError("PackedArray index out of range")
+        return _decode(self._codec, self._buf, pos)
+
+    def __iter__(self):
+        codec, buf, pos, done = self._codec, self._buf, self._pos, 0
+        while self._more(pos, done):
+            yield _decode(codec, buf, pos)
+            pos = codec[1](buf, pos)
+            done += 1
+
+    def __len__(self):
+        if self._size is None:
+            self._offset(sys.maxsize - 1)
+            return len(self._offsets) - 1
+        return self._size
+
+    def __repr__(self):
+        return "<PackedArray of %d items>" % len(self)
+
+
+def _buffer(data):
+    view = memoryview(data)
+    return view if view.format == 'B' else view.cast('B')
+
+
+def msgpack_view(data):
+    """Navigable view of MessagePack `data` without decoding it up front
+
+    `data` may be bytes, a bytearray, an mmap or any other buffer.  Maps and
+    arrays come back as PackedMap and PackedArray nodes over a memoryview of
+    it; strings and numbers are decoded when reached, and binary payloads
+    are memoryview slices.  Extension types, timestamps (type -1) included,
+    are not interpreted: each comes back as a (type, memoryview) tuple.
+    """
+    return _decode(_MSGPACK, _buffer(data), 0)
+
+
+def cbor_view(data):
+    """Navigable view of CBOR `data`, as msgpack_view does for MessagePack
+
+    Bignums (tags 2 and 3) decode to ints; any other tag is dropped and the
+    value it qualifies returned as is.
+    """
+    return _decode(_CBOR, _buffer(data), 0)
+
+
+def _tag_matches(tag, name):
+    "Match an element tag by its full or namespace-local name"
+    return tag == name or (name[:1] != '{' and
+                           tag.endswith('}' + name) and tag[:1] == '{')
+
+
+class XMLNode(Mapping):
+    """ElementTree element navigable as a nested mapping
+
+    Keys follow the xmltodict convention: '@name' for an XML attribute,
+    '#text' for text alongside attributes or children, and a child tag for
+    that child's value, a list if the tag repeats.  A child with neither
+    attributes nor children stands for its text, otherwise for an XMLNode.
+    Attribute access tries a child tag, then an XML attribute, but the
+    Mapping methods (keys, items, values, get) come first: a child tagged
+    <items> is reached as node['items'].  Tags may be given without their
+    namespace.
+    """
+    __slots__ = ('_element',)
+
+    def __init__(self, element):
+        self._element = element
+
+    @staticmethod
+    def _value(element):
+        if len(element) or element.attrib:
+            return XMLNode(element)
+        text = element.text
+        return text if text and not text.isspace() else None
+
+    def _text(self):
+        text = self._element.text
+        return text if text and not text.isspace() else None
+
+    def __getitem__(self, key):
+        element = self._element
+        if not isinstance(key, str):
+            raise KeyError(key)
+        if key[:1] == '@':
+            return element.attrib[key[1:]]
+        if key == '#text':
+            text = self._text()
+            if text is None:
+                raise KeyError(key)
+            return text
+        found = [child for child in element if _tag_matches(child.tag, key)]
+        if not found:
+            raise KeyError(key)
+        if len(found) == 1:
+            return self._value(found[0])
+        return [self._value(child) for child in found]
+
+    def __getattr__(self, name):
+        if name[:2] == '__':
+            raise AttributeError(name)
+        try:
+            return self[name]
+        except KeyError:
+            pass
+        try:
+            return self['@' + name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def __iter__(self):
+        element = self._element
+        for name in element.attrib:
+            yield '@' + name
+        seen = set()
+        for child in element:
+            if child.tag not in seen:
+                seen.add(child.tag)
+                yield child.tag
+        if self._text() is not None:
+            yield '#text'
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def items(self):
+        return _XMLItems(self)
+
+    def __repr__(self):
+        return "<XMLNode %s>" % self._element.tag
+
+
+class _XMLItems(ItemsView):
+    "Items of an XMLNode, grouping repeated tags in a single pass"
+
+    def __iter__(self):
+        node = self._mapping
+        element = node._element
+        for name, value in element.attrib.items():
+            yield '@' + name, value
+        groups = {}
+        for child in element:
+            groups.setdefault(child.tag, []).append(child)
+        for tag, children in groups.items():
+            if len(children) == 1:
+                yield tag, node._value(children[0])
+            else:
+                yield tag, [node._value(child) for child in children]
+        text = node._text()
+        if text is not None:
+            yield '#text', text
+
+
+def iterxml(source, record, paths=None, default=Null):
+    """Stream each `record` element of an XML file or file object
+
+    Parsing is incremental, and every record is cleared and detached from
+    its parent once handled, as is any other element completed outside a
+    record, so memory use does not grow with the file.  A record nested in
+    another is yielded first, and kept until the outer one has been.  With
+    `paths` (a single path or a sequence of them), yields a tuple of the
+    values at those paths (see XMLNode), where missing elements coalesce to
+    `default`: Null, or pass a NullCoalesce sentinel.  Without, yields each
+    record as a GreedyAccess proxy over an XMLNode, valid until the next
+    record is read.
+    """
+    if isinstance(paths, str):
+        paths = (paths,)
+    extract = Extraction(*paths, default=default) if paths else None
+    parents = []
+    building = 0                # Records open around the current element
+    for event, element in ElementTree.iterparse(source, ('start', 'end')):
+        if event == 'start':
+            parents.append(element)
+            if _tag_matches(element.tag, record):
+                building += 1
+            continue
+        parents.pop()
+        if _tag_matches(element.tag, record):
+            building -= 1
+            node = XMLNode(element)
+            yield extract(node) if extract else GreedyAccess(node)
+        if building:
+            continue            # Part of a record still being read
+        element.clear()
+        if parents:
+            parents[-1].remove(element)
+
+
 def make_test():
     from types import SimpleNamespace
     cfg = SimpleNamespace()
@@ -0,0 +1,117 @@
+import unittest
+
+from coalesce import CachedAccess, Null, Watched
+
+
+class Model(object):
+    "Stand-in for an ORM model whose attributes are expensive to compute"
+    calls = 0
+
+    def __init__(self, **children):
+        self.children = children
+
+    def __getattr__(self, name):
+        Model.calls += 1
+        try:
+            return self.children[name]
+        except KeyError:
+            raise AttributeError(name)
+
+
+class TestCachedAccess(unittest.TestCase):
+
+    def setUp(self):
+        Model.calls = 0
+        self.obj = Model(a=Model(b=Model(c=42)))
+
+    def test_memoized_chain(self):
+        root = CachedAccess(self.obj)
+        self.assertEqual(root.a.b.c, 42)
+        self.assertEqual(Model.calls, 3)
+        self.assertEqual(root.a.b.c, 42)
+        self.assertEqual(Model.calls, 3)
+
+    def test_negative_results(self):
+        root = CachedAccess(self.obj)
+        self.assertIs(root.a.missing, Null)
+        calls = Model.calls
+        self.assertIs(root.a.missing, Null)
+        self.assertEqual(Model.calls, calls)
+
+    def test_items_and_attributes_distinct(self):
+        root = CachedAccess({'items': [1, 2]})
+        self.assertEqual(root['items'], [1, 2])
+        self.assertTrue(callable(root.items.__wrapped__))
+        self.assertEqual(root['items'][0:1], [1])
+
+    def test_bounded(self):
+        root = CachedAccess({i: i for i in range(10)}, maxsize=4)
+        for i in range(10):
+            root[i]
+        self.assertLessEqual(len(root._self_cache), 4)
+
+    def test_size_zero(self):
+        root = CachedAccess(self.obj, maxsize=0)
+        self.assertEqual(root.a.b.c, 42)
+        self.assertEqual(len(root._self_cache), 0)
+        self.assertEqual(root.a.b.c, 42)
+        self.assertEqual(Model.calls, 6)
+
+    def test_refresh(self):
+        root = CachedAccess(self.obj)
+        root.a.b.c
+        self.obj.children['a'] = Model(b=Model(c=7))
+        self.assertEqual(root.a.b.c, 42)
+        root.refresh()
+        self.assertEqual(root.a.b.c, 7)
+
+    def test_invalidate_path(self):
+        root = CachedAccess(self.obj)
+        root.a.b.c
+        self.obj.children['a'].children['b'] = Model(c=7)
+        root.invalidate('a.b')
+        calls = Model.calls
+        self.assertEqual(root.a.b.c, 7)
+        self.assertEqual(Model.calls, calls + 2)
+
+    def test_invalidate_from_child(self):
+        root = CachedAccess(self.obj)
+        child = root.a
+        child.b.c
+        self.obj.children['a'].children['b'] = Model(c=7)
+        child.invalidate('b')
+        self.assertEqual(root.a.b.c, 7)
+
+    def test_refresh_child_only(self):
+        self.obj.children['z'] = Model(c=1)
+        root = CachedAccess(self.obj)
+        root.z.c
+        root.a.b.c
+        root.a.refresh()
+        calls = Model.calls
+        root.z.c
+        self.assertEqual(Model.calls, calls)
+        root.a.b.c
+        self.assertEqual(Model.calls, calls + 3)
+
+    def test_invalidate_digit_key(self):
+        data = {'0': 'zero'}
+        root = CachedAccess(data)
+        self.assertEqual(root['0'], 'zero')
+        data['0'] = 'nil'
+        root.invalidate('0')
+        self.assertEqual(root['0'], 'nil')
+
+    def test_follows_watched(self):
+        doc = Watched({'user': {'name': 'Iggy'}})
+        root = CachedAccess(doc['user'])
+        self.assertEqual(root['name'], 'Iggy')
+        doc['user']['name'] = 'Jim'
+        self.assertEqual(root['name'], 'Jim')
+        doc['user'] = {'name': 'James'}
+        self.assertEqual(root['name'], 'Jim')  # root still wraps the old dict
+        self.assertEqual(CachedAccess(doc)['user']['name'], 'James')
+
+
+if __name__ == '__main__':
+    unittest.main()
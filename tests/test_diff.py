@@ -0,0 +1,141 @@
+import copy
+import unittest
+from collections.abc import ItemsView
+from types import SimpleNamespace
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+import coalesce
+from coalesce import Watched, diff
+
+
+class CountingItems(ItemsView):
+
+    def __iter__(self):
+        CountingDict.walks += 1
+        return iter(dict.items(self._mapping))
+
+
+class CountingDict(dict):
+    "dict counting how often its items are walked"
+    walks = 0
+
+    def items(self):
+        return CountingItems(self)
+
+
+class Leaf(int):
+    "int counting how often it is compared"
+    compared = 0
+
+    def __eq__(self, other):
+        Leaf.compared += 1
+        return int.__eq__(self, other)
+
+    __hash__ = int.__hash__
+
+
+class TestDiff(unittest.TestCase):
+
+    def test_changes(self):
+        old = {'a': 1, 'b': {'c': [1, 2]}, 'd': 'x'}
+        new = {'a': 2, 'b': {'c': [1, 3, 4]}, 'e': 'y'}
+        self.assertEqual(list(diff(old, new)), [
+            (('a',), 1, 2),
+            (('b', 'c', 1), 2, 3),
+            (('b', 'c', 2), None, 4),
+            (('d',), 'x', None),
+            (('e',), None, 'y'),
+        ])
+
+    def test_null_rules(self):
+        old = {'a': None, 'b': float('nan'), 'c': [None]}
+        new = {'b': None, 'c': [], 'd': None}
+        self.assertEqual(list(diff(old, new)), [])
+        self.assertEqual(list(diff({'a': -1}, {}, sentinel=-1)), [])
+        self.assertEqual(list(diff({'a': None}, {}, sentinel=-1)),
+                         [(('a',), None, -1)])
+
+    def test_structure_changes(self):
+        self.assertEqual(list(diff({'a': [1]}, {'a': {0: 1}})),
+                         [(('a',), [1], {0: 1})])
+        self.assertEqual(list(diff({'a': 1}, {'a': True})),
+                         [(('a',), 1, True)])
+        self.assertEqual(list(diff({'a': 1}, {'a': {'b': 2}})),
+                         [(('a',), 1, {'b': 2})])
+
+    def test_namespace_and_mapping(self):
+        old = SimpleNamespace(a=1, b=SimpleNamespace(c=2))
+        new = SimpleNamespace(a=1, b=SimpleNamespace(c=3))
+        self.assertEqual(list(diff(old, new)), [(('b', 'c'), 2, 3)])
+
+    def test_lazy(self):
+        changes = diff({'a': 1, 'b': 2}, {'a': 2, 'b': 3})
+        self.assertEqual(next(changes), (('a',), 1, 2))
+
+    def test_hash_collisions(self):
+        self.assertEqual(hash(-1), hash(-2))
+        self.assertEqual(list(diff({'a': -1}, {'a': -2})),
+                         [(('a',), -1, -2)])
+        self.assertEqual(list(diff({'a': [-1]}, {'a': [-2]})),
+                         [(('a', 0), -1, -2)])
+
+    def test_unwatched_mutation(self):
+        cfg = {'a': {'b': 1}}
+        snap = copy.deepcopy(cfg)
+        self.assertEqual(list(diff(snap, cfg)), [])
+        cfg['a']['b'] = 5
+        self.assertEqual(list(diff(snap, cfg)), [(('a', 'b'), 1, 5)])
+        snap['a']['b'] = 5
+        self.assertEqual(list(diff(snap, cfg)), [])
+
+    def test_watched_subtrees_skipped(self):
+        big = CountingDict(('k%d' % i, {'v': i}) for i in range(100))
+        old = Watched({'big': big, 'small': {'x': 1}})
+        new = Watched({'big': CountingDict(big), 'small': {'x': 1}})
+        self.assertEqual(list(diff(old, new)), [])
+        new['small']['x'] = 2
+        CountingDict.walks = 0
+        self.assertEqual(list(diff(old, new)), [(('small', 'x'), 1, 2)])
+        self.assertEqual(CountingDict.walks, 0)
+
+    def test_matching_digests_not_compared(self):
+        def make():
+            return {'big': {'k%d' % i: Leaf(i) for i in range(1000)},
+                    'small': {'x': 1}}
+        old, new = Watched(make()), Watched(make())
+        self.assertEqual(list(diff(old, new)), [])
+        new['small']['x'] = 2
+        Leaf.compared = 0
+        self.assertEqual(list(diff(old, new)), [(('small', 'x'), 1, 2)])
+        self.assertEqual(Leaf.compared, 0)
+
+    @unittest.skipIf(np is None, "requires numpy")
+    def test_array_leaves(self):
+        self.assertEqual(list(diff({'a': np.array([1, 2])},
+                                   {'a': np.array([1, 2])})), [])
+        changes = list(diff({'a': np.array([1, 2])}, {'a': np.array([1, 3])}))
+        self.assertEqual([path for path, _, _ in changes], [('a',)])
+        self.assertEqual(len(list(diff({'a': np.array([1, 2])}, {},
+                                       sentinel=-1))), 1)
+
+    def test_equal_copies_skip_descent(self):
+        old = {'a': {'b': {'c': 1}}}
+        new = {'a': {'b': {'c': 1}}}
+        cache = coalesce._MerkleCache()
+        self.assertEqual(coalesce._tree_hash(old['a'], cache),
+                         coalesce._tree_hash(new['a'], cache))
+
+    def test_watched_mutation_invalidates(self):
+        doc = Watched({'a': {'b': 1}})
+        snapshot = {'a': {'b': 1}}
+        self.assertEqual(list(diff(snapshot, doc)), [])
+        doc['a']['b'] = 2
+        self.assertEqual(list(diff(snapshot, doc)), [(('a', 'b'), 1, 2)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+import mmap
+import tempfile
+import unittest
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import cbor2
+except ImportError:
+    cbor2 = None
+
+from coalesce import (GreedyAccess, Null, NullCoalesce, PackedArray,
+                      PackedMap, cbor_view, diff, msgpack_view, resolve)
+
+DOC = {
+    'user': {'name': 'Iggy', 'tags': ['punk', None], 'age': -5,
+             'plays': 2**40, 'rating': 1.5, 'active': True},
+    'albums': list(range(300)),
+    'k' * 40: {'nested': {}},
+    7: 'seven',
+}
+
+# {"a": [1, 2, 3], "b": {"c": "xy"}} in MessagePack, written out by hand
+MSGPACK = bytes([0x82, 0xa1, 0x61, 0x93, 0x01, 0x02, 0x03,
+                 0xa1, 0x62, 0x81, 0xa1, 0x63, 0xa2, 0x78, 0x79])
+
+# {"a": [_ 1, 2], "b": (_ "x", "y")} in CBOR, with indefinite lengths
+CBOR = bytes([0xbf, 0x61, 0x61, 0x9f, 0x01, 0x02, 0xff,
+              0x61, 0x62, 0x7f, 0x61, 0x78, 0x61, 0x79, 0xff, 0xff])
+
+
+class TestHandEncoded(unittest.TestCase):
+
+    def test_msgpack(self):
+        view = msgpack_view(MSGPACK)
+        self.assertIsInstance(view, PackedMap)
+        self.assertIsInstance(view['a'], PackedArray)
+        self.assertEqual(list(view['a']), [1, 2, 3])
+        self.assertEqual(view['a'][-1], 3)
+        self.assertEqual(GreedyAccess(view).b.c, 'xy')
+        self.assertIs(GreedyAccess(view).b.d, Null)
+        self.assertEqual(list(view), ['a', 'b'])
+        with self.assertRaises(AttributeError):
+            NullCoalesce(view).b.d
+
+    def test_underscore_keys(self):
+        # {"_id": 7} and a fixext 4 timestamp (type -1) in MessagePack
+        view = msgpack_view(bytes([0x82, 0xa3, 0x5f, 0x69, 0x64, 0x07,
+                                   0xa1, 0x74, 0xd6, 0xff, 0, 0, 0, 1]))
+        self.assertEqual(view._id, 7)
+        self.assertEqual(GreedyAccess(view)._id, 7)
+        ext_type, data = view.t
+        self.assertEqual((ext_type, bytes(data)), (-1, b'\0\0\0\x01'))
+
+    def test_cbor_indefinite(self):
+        view = cbor_view(CBOR)
+        self.assertEqual(len(view), 2)
+        self.assertEqual(len(view['a']), 2)
+        self.assertEqual(view['a'][1], 2)
+        self.assertEqual(view.b, 'xy')
+        with self.assertRaises(IndexError):
+            view['a'][2]
+
+    def test_cbor_tags(self):
+        # {"big": 2(h'010000000000000000'), "neg": 3(h'01...'), "t": 1(0)}
+        data = bytes([0xa3, 0x63, 0x62, 0x69, 0x67, 0xc2, 0x49, 0x01]
+                     + [0x00] * 8 + [0x63, 0x6e, 0x65, 0x67, 0xc3, 0x49, 0x01]
+                     + [0x00] * 8 + [0x61, 0x74, 0xc1, 0x00])
+        view = cbor_view(data)
+        self.assertEqual(view['big'], 2**64)
+        self.assertEqual(view['neg'], -1 - 2**64)
+        self.assertEqual(view['t'], 0)
+
+    def test_cbor_reserved_simple(self):
+        for byte in (0xfc, 0xfd, 0xfe):
+            with self.assertRaises(ValueError):
+                cbor_view(bytes([0x81, byte]))[0]
+        with self.assertRaises(ValueError):
+            cbor_view(bytes([0x81, 0xf8, 0x14]))[0]
+        self.assertEqual(cbor_view(bytes([0x81, 0xf8, 0x20]))[0], 32)
+
+    def test_bytearray_and_mmap(self):
+        self.assertEqual(resolve(msgpack_view(bytearray(MSGPACK)), 'a.1'), 2)
+        with tempfile.TemporaryFile() as fh:
+            fh.write(MSGPACK)
+            fh.flush()
+            buf = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+            self.assertEqual(resolve(msgpack_view(buf), 'b.c'), 'xy')
+
+
+class RoundTrip(object):
+    "Views of encoded DOC agree with DOC itself"
+
+    def test_navigation(self):
+        view = self.view(self.encode(DOC))
+        self.assertEqual(GreedyAccess(view).user.name, 'Iggy')
+        self.assertIsNone(view['user']['tags'][1])
+        self.assertEqual(view[7], 'seven')
+        self.assertEqual(view['albums'][250], 250)
+        self.assertEqual(resolve(view, 'user.plays'), 2**40)
+        self.assertEqual(resolve(view, ('k' * 40, 'nested', 'x'), 0), 0)
+
+    def test_diff_against_decoded(self):
+        self.assertEqual(list(diff(DOC, self.view(self.encode(DOC)))), [])
+
+    def test_binary_is_zero_copy(self):
+        data = self.encode({'blob': b'\x00\x01\x02'})
+        blob = self.view(data)['blob']
+        self.assertIsInstance(blob, memoryview)
+        self.assertEqual(bytes(blob), b'\x00\x01\x02')
+
+
+@unittest.skipIf(msgpack is None, "requires msgpack")
+class TestMsgpack(RoundTrip, unittest.TestCase):
+    view = staticmethod(msgpack_view)
+    encode = staticmethod(lambda doc: msgpack.packb(doc))
+
+
+@unittest.skipIf(cbor2 is None, "requires cbor2")
+class TestCbor(RoundTrip, unittest.TestCase):
+    view = staticmethod(cbor_view)
+    encode = staticmethod(lambda doc: cbor2.dumps(doc))
+
+    def test_bignums(self):
+        view = cbor_view(cbor2.dumps({'big': 2**70, 'neg': -2**70}))
+        self.assertEqual(view['big'], 2**70)
+        self.assertEqual(view['neg'], -2**70)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import copy
+import sys
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import coalesce
+from coalesce import (CachedAccess, Extraction, Watched, diff, flatten,
+                      parse_path, resolve)
+
+THREADS = 8
+ROUNDS = 300
+
+
+class TestThreadSafety(unittest.TestCase):
+
+    def setUp(self):
+        self.interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+
+    def tearDown(self):
+        sys.setswitchinterval(self.interval)
+
+    def test_readers_and_writers(self):
+        raw = {'counters': {'k%d' % i: 0 for i in range(THREADS)}}
+        doc = Watched(raw)
+        keys = sorted(raw['counters'])
+        pick = Extraction(*['counters.' + key for key in keys])
+        cached = CachedAccess(doc)
+
+        def work(n):
+            key = keys[n]
+            for value in range(1, ROUNDS + 1):
+                doc['counters'][key] = value
+                pick(doc)
+                cached['counters'][keys[(n + 1) % THREADS]].unbox()
+                if value % 50 == 0:
+                    flatten(doc)
+                    list(diff(copy.deepcopy(raw), doc))
+
+        with ThreadPoolExecutor(THREADS) as pool:
+            list(pool.map(work, range(THREADS)))
+
+        expected = tuple(ROUNDS for _ in keys)
+        self.assertEqual(pick(doc), expected)
+        self.assertEqual(tuple(cached['counters'][key] for key in keys),
+                         expected)
+        self.assertEqual(dict(flatten(doc)), flatten(raw))
+        self.assertEqual(list(diff(copy.deepcopy(raw), doc)), [])
+
+    def test_compiled_paths(self):
+        def work(n):
+            for i in range(ROUNDS):
+                path = 'a.%d.b%d' % (i, n)
+                self.assertEqual(parse_path(path), ('a', i, 'b%d' % n))
+                self.assertEqual(resolve({'a': {i: {'b%d' % n: n}}}, path), n)
+
+        with ThreadPoolExecutor(THREADS) as pool:
+            list(pool.map(work, range(THREADS)))
+
+    def test_hash_stored_across_forget(self):
+        doc = {'a': {'b': 1}}
+        cache = coalesce._MerkleCache()
+        epoch = cache.epoch
+        cache.forget(doc, ('a', 'b'))
+        cache.put(doc['a'], 123, epoch)
+        self.assertIsNone(cache.get(doc['a']))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import unittest
+from types import SimpleNamespace
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+from coalesce import GreedyAccess, NullCoalesce, Null, null_mask
+
+
+@unittest.skipIf(np is None, "requires numpy")
+class TestNumpy(unittest.TestCase):
+
+    def test_float_unbox(self):
+        arr = np.array([1.0, np.nan, 3.0])
+        self.assertEqual(GreedyAccess(arr).unbox(0).tolist(), [1.0, 0.0, 3.0])
+        self.assertEqual(NullCoalesce(arr).unbox(lambda: -1).tolist(),
+                         [1.0, -1.0, 3.0])
+
+    def test_object_mask(self):
+        arr = np.array([1, None, float('nan'), 'x'], dtype=object)
+        self.assertEqual(null_mask(arr).tolist(), [False, True, True, False])
+        self.assertEqual(GreedyAccess(arr).unbox('-').tolist(),
+                         [1, '-', '-', 'x'])
+
+    def test_default_outside_dtype(self):
+        arr = np.array([1.0, np.nan])
+        self.assertEqual(GreedyAccess(arr).unbox('spam').tolist(),
+                         [1.0, 'spam'])
+
+    def test_attribute_map(self):
+        arr = np.array([SimpleNamespace(a=1), None, SimpleNamespace(b=2)],
+                       dtype=object)
+        self.assertEqual(GreedyAccess(arr).a.unbox(0).tolist(), [1, 0, 0])
+        self.assertEqual(GreedyAccess(arr).shape, (3,))
+
+    def test_element_attributes_shadow_array(self):
+        arr = np.array([SimpleNamespace(T=1), SimpleNamespace(T=2)],
+                       dtype=object)
+        self.assertEqual(GreedyAccess(arr).T.unbox().tolist(), [1, 2])
+        self.assertEqual(NullCoalesce(arr).T.unbox().tolist(), [1, 2])
+
+    def test_item_map(self):
+        arr = np.array([{'x': {'y': 1}}, None, {'x': {}}], dtype=object)
+        self.assertEqual(GreedyAccess(arr)['x']['y'].unbox(0).tolist(),
+                         [1, 0, 0])
+
+    def test_null_coalesce_map(self):
+        arr = np.array([{'x': 1}, None], dtype=object)
+        self.assertEqual(NullCoalesce(arr)['x'].unbox(0).tolist(), [1, 0])
+        with self.assertRaises(KeyError):
+            NullCoalesce(np.array([{'y': 1}], dtype=object))['x']
+
+    def test_position_out_of_range(self):
+        arr = np.array([{'x': 1}, {'x': 2}], dtype=object)
+        self.assertIs(GreedyAccess(arr)[5], Null)
+        self.assertEqual(GreedyAccess(arr)[-1], {'x': 2})
+        with self.assertRaises(IndexError):
+            NullCoalesce(arr)[5]
+
+    def test_custom_sentinel(self):
+        arr = np.array([1, -1, 2])
+        self.assertEqual(NullCoalesce(arr, sentinel=-1).unbox(0).tolist(),
+                         [1, 0, 2])
+
+    def test_structured(self):
+        arr = np.array([(1, 2.0), (3, np.nan)],
+                       dtype=[('i', 'i4'), ('f', 'f8')])
+        self.assertEqual(GreedyAccess(arr).f.unbox(9).tolist(), [2.0, 9.0])
+        self.assertEqual(GreedyAccess(arr)['i'].unbox().tolist(), [1, 3])
+        self.assertIs(GreedyAccess(arr).missing, Null)
+
+
+@unittest.skipIf(pd is None, "requires pandas")
+class TestPandas(unittest.TestCase):
+
+    def test_series_map(self):
+        s = pd.Series([{'a': 1}, None, {'a': None}, {'b': 1}])
+        self.assertEqual(GreedyAccess(s)['a'].unbox(0).tolist(),
+                         [1.0, 0.0, 0.0, 0.0])
+
+    def test_series_native_label(self):
+        s = pd.Series([1, None], index=['a', 'b'])
+        self.assertEqual(GreedyAccess(s)['a'], 1)
+
+    def test_element_attributes_shadow_series(self):
+        s = pd.Series([SimpleNamespace(name='a', size=1), None,
+                       SimpleNamespace(name='c')])
+        self.assertEqual(GreedyAccess(s).name.unbox('-').tolist(),
+                         ['a', '-', 'c'])
+        self.assertEqual(GreedyAccess(s).size.unbox(0).tolist(), [1, 0, 0])
+        self.assertEqual(GreedyAccess(s).unbox().size, 3)
+        self.assertEqual(GreedyAccess(s).shape, (3,))
+
+    def test_dataframe(self):
+        df = pd.DataFrame({'a': [1, None]})
+        self.assertEqual(GreedyAccess(df).a.unbox(0).tolist(), [1.0, 0.0])
+        self.assertIs(GreedyAccess(df).missing, Null)
+
+
+if __name__ == '__main__':
+    unittest.main()
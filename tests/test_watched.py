@@ -0,0 +1,162 @@
+import unittest
+from types import SimpleNamespace
+
+from coalesce import (Extraction, GreedyAccess, Watched, changes, flatten,
+                      resolve, touch)
+
+
+def make_doc():
+    return {
+        'user': {'name': 'Iggy', 'albums': ['The Idiot', 'Lust for Life']},
+        'band': SimpleNamespace(name='Stooges', members=4),
+    }
+
+
+class TestResolve(unittest.TestCase):
+
+    def test_mixed_access(self):
+        doc = make_doc()
+        self.assertEqual(resolve(doc, 'band.name'), 'Stooges')
+        self.assertEqual(resolve(doc, ('user', 'albums', 1)), 'Lust for Life')
+        self.assertEqual(resolve(doc, 'user.email', 'n/a'), 'n/a')
+        self.assertIsNone(resolve(doc, 'band.name.first.letter'))
+
+
+class TestWatched(unittest.TestCase):
+
+    def test_write_through(self):
+        raw = make_doc()
+        doc = Watched(raw)
+        doc['user']['name'] = 'Jim'
+        doc['band'].members = 5
+        doc['user']['albums'].append('Raw Power')
+        self.assertEqual(raw['user']['name'], 'Jim')
+        self.assertEqual(raw['band'].members, 5)
+        self.assertEqual(len(raw['user']['albums']), 3)
+        self.assertEqual(changes(doc), [('user', 'name'),
+                                        ('band', 'members'),
+                                        ('user', 'albums')])
+        self.assertEqual(changes(doc), [])
+
+    def test_greedy_navigation(self):
+        doc = Watched(make_doc())
+        self.assertEqual(GreedyAccess(doc)['band'].name, 'Stooges')
+        self.assertIsNone(GreedyAccess(doc)['band'].label.unbox())
+
+    def test_touch(self):
+        raw = make_doc()
+        doc = Watched(raw)
+        pick = Extraction('user.name')
+        self.assertEqual(pick(doc), ('Iggy',))
+        raw['user']['name'] = 'Jim'
+        self.assertEqual(pick(doc), ('Iggy',))
+        touch(doc, 'user.name')
+        self.assertEqual(pick(doc), ('Jim',))
+
+    def test_children_from_get_and_iteration(self):
+        raw = {'user': {'albums': ['The Idiot']}, 'l': [{'k': 1}, {'k': 1}]}
+        doc = Watched(raw)
+        pick = Extraction('user.albums.1', 'l.1.k')
+        self.assertEqual(pick(doc), (None, 1))
+        doc['user'].get('albums').append('Raw Power')
+        for item in doc['l']:
+            item['k'] = 2
+        self.assertEqual(changes(doc), [('user', 'albums'),
+                                        ('l', 0, 'k'), ('l', 1, 'k')])
+        self.assertEqual(pick(doc), ('Raw Power', 2))
+        self.assertIsNone(doc['user'].get('missing'))
+
+    def test_children_from_views(self):
+        doc = Watched({'a': {'x': 1}, 'b': {'x': 1}})
+        for key, value in doc.items():
+            value['x'] = 2
+        for value in doc.values():
+            value['y'] = 3
+        doc.setdefault('c', {})['x'] = 4
+        self.assertEqual(changes(doc), [('a', 'x'), ('b', 'x'), ('a', 'y'),
+                                        ('b', 'y'), (), ('c', 'x')])
+
+    def test_slice_is_a_copy(self):
+        raw = {'a': [1, 2, 3]}
+        doc = Watched(raw)
+        doc['a'][0:2].append(9)
+        self.assertEqual(raw['a'], [1, 2, 3])
+        self.assertEqual(changes(doc), [])
+
+    def test_requires_watched(self):
+        with self.assertRaises(TypeError):
+            touch(make_doc(), 'user.name')
+        with self.assertRaises(TypeError):
+            changes(make_doc())
+
+
+class TestIncremental(unittest.TestCase):
+
+    def test_extraction_dependencies(self):
+        doc = Watched(make_doc())
+        pick = Extraction('user.name', 'band.members', default='?')
+        other = Extraction('user.albums.0')
+        self.assertEqual(pick(doc), ('Iggy', 4))
+        self.assertEqual(other(doc), ('The Idiot',))
+        doc['band'].members = 5
+        journal = doc._self_journal
+        self.assertNotIn(pick, journal.extractions)
+        self.assertIn(other, journal.extractions)
+        self.assertEqual(pick(doc), ('Iggy', 5))
+        del doc['user']['name']
+        self.assertEqual(pick(doc), ('?', 5))
+
+    def test_extraction_from_child(self):
+        doc = Watched(make_doc())
+        pick = Extraction('name')
+        self.assertEqual(pick(doc['user']), ('Iggy',))
+        self.assertEqual(pick(doc['band']), ('Stooges',))
+
+    def test_flatten_matches_rebuild(self):
+        raw = make_doc()
+        doc = Watched(raw)
+        flatten(doc)
+        doc['user']['albums'][0] = 'Raw Power'
+        doc['user']['albums'].pop()
+        doc['band'].members = {'vocals': 'Iggy'}
+        doc['label'] = 'Elektra'
+        self.assertEqual(dict(flatten(doc)), flatten(raw))
+        self.assertEqual(flatten(doc)[('band', 'members', 'vocals')], 'Iggy')
+        self.assertNotIn(('user', 'albums', 1), flatten(doc))
+
+    def test_write_beneath_opaque_leaf(self):
+        class Opaque(object):
+            pass
+        raw = {'a': Opaque()}
+        doc = Watched(raw)
+        flatten(doc)
+        doc['a'].y = 5
+        self.assertEqual(dict(flatten(doc)), flatten(raw))
+        self.assertEqual(list(flatten(doc)), [('a',)])
+
+    def test_sequence_delete_shifts(self):
+        raw = {'a': [1, 2, 3]}
+        doc = Watched(raw)
+        pick = Extraction('a.0', 'a.1', 'a.2')
+        self.assertEqual(pick(doc), (1, 2, 3))
+        flatten(doc)
+        del doc['a'][0]
+        self.assertEqual(changes(doc), [('a',)])
+        self.assertEqual(pick(doc), (2, 3, None))
+        self.assertEqual(dict(flatten(doc)), flatten(raw))
+
+    def test_negative_index(self):
+        raw = {'a': [1, 2, 3]}
+        doc = Watched(raw)
+        pick = Extraction('a.2')
+        self.assertEqual(pick(doc), (3,))
+        flatten(doc)
+        doc['a'][-1] = 99
+        self.assertEqual(changes(doc), [('a', 2)])
+        self.assertEqual(pick(doc), (99,))
+        self.assertEqual(dict(flatten(doc)), flatten(raw))
+        self.assertNotIn(('a', -1), flatten(doc))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,154 @@
+import io
+import tracemalloc
+import unittest
+import xml.etree.ElementTree as ElementTree
+
+from coalesce import Null, XMLNode, diff, flatten, iterxml, resolve
+
+FEED = b"""<?xml version="1.0"?>
+<feed xmlns="http://www.w3.org/2005/Atom">
+  <title>Releases</title>
+  <entry id="1">
+    <title>The Idiot</title>
+    <author><name>Iggy Pop</name></author>
+    <link href="a"/><link href="b"/>
+  </entry>
+  <entry id="2">
+    <title type="text">Lust for Life</title>
+    <empty/>
+  </entry>
+</feed>
+"""
+
+
+class TestXMLNode(unittest.TestCase):
+
+    def setUp(self):
+        self.feed = XMLNode(ElementTree.fromstring(FEED))
+
+    def test_keys(self):
+        entry = self.feed['entry'][0]
+        self.assertEqual(list(entry), [
+            '@id', '{http://www.w3.org/2005/Atom}title',
+            '{http://www.w3.org/2005/Atom}author',
+            '{http://www.w3.org/2005/Atom}link'])
+        self.assertEqual(entry['@id'], '1')
+        self.assertEqual(entry.id, '1')
+        self.assertEqual(entry.author.name, 'Iggy Pop')
+        self.assertEqual([link['@href'] for link in entry['link']],
+                         ['a', 'b'])
+
+    def test_text_with_attributes(self):
+        title = self.feed['entry'][1]['title']
+        self.assertEqual(title['@type'], 'text')
+        self.assertEqual(title['#text'], 'Lust for Life')
+        self.assertIsNone(self.feed['entry'][1]['empty'])
+
+    def test_paths(self):
+        self.assertEqual(resolve(self.feed, 'entry.0.link.1.@href'), 'b')
+        self.assertIsNone(resolve(self.feed, 'entry.1.author.name'))
+
+    def test_items(self):
+        entry = self.feed['entry'][0]
+        self.assertEqual(list(entry.items()), [(key, entry[key])
+                                               for key in entry])
+        title = dict(self.feed['entry'][1].items())[
+            '{http://www.w3.org/2005/Atom}title']
+        self.assertEqual(dict(title.items()),
+                         {'@type': 'text', '#text': 'Lust for Life'})
+
+    def test_underscore_names(self):
+        node = XMLNode(ElementTree.fromstring('<r _id="1"><_rev>2</_rev></r>'))
+        self.assertEqual(node._id, '1')
+        self.assertEqual(node._rev, '2')
+
+    def test_mapping_methods_win(self):
+        node = XMLNode(ElementTree.fromstring(
+            '<r><items>x</items><get>y</get></r>'))
+        self.assertTrue(callable(node.items))
+        self.assertEqual(node['items'], 'x')
+        self.assertEqual(node['get'], 'y')
+
+    def test_flatten_and_diff(self):
+        leaves = flatten(self.feed)
+        self.assertEqual(leaves[('{http://www.w3.org/2005/Atom}title',)],
+                         'Releases')
+        changed = FEED.replace(b'Iggy Pop', b'James Osterberg')
+        changes = list(diff(self.feed,
+                            XMLNode(ElementTree.fromstring(changed))))
+        self.assertEqual([(old, new) for _, old, new in changes],
+                         [('Iggy Pop', 'James Osterberg')])
+
+
+class TestIterXML(unittest.TestCase):
+
+    def test_paths(self):
+        records = list(iterxml(io.BytesIO(FEED), 'entry',
+                               ['@id', 'author.name', 'title.#text']))
+        self.assertEqual(records[0][:2], ('1', 'Iggy Pop'))
+        self.assertIs(records[0][2], Null)
+        self.assertEqual(records[1], ('2', Null, 'Lust for Life'))
+
+    def test_nested_records(self):
+        data = (b'<root><item id="1"><sub><item id="2"/></sub></item>'
+                b'<item id="3"/></root>')
+        records = list(iterxml(io.BytesIO(data), 'item',
+                               ['@id', 'sub.item.@id']))
+        self.assertEqual(records, [('2', Null), ('1', '2'), ('3', Null)])
+
+    def test_single_path(self):
+        records = list(iterxml(io.BytesIO(FEED), 'entry', '@id'))
+        self.assertEqual(records, [('1',), ('2',)])
+
+    def test_sentinel(self):
+        records = list(iterxml(io.BytesIO(FEED), 'entry', ['author.name'],
+                               default=float('inf')))
+        self.assertEqual(records, [('Iggy Pop',), (float('inf'),)])
+
+    def test_greedy_records(self):
+        names = [entry.author.name.unbox('anonymous')
+                 for entry in iterxml(io.BytesIO(FEED), 'entry')]
+        self.assertEqual(names, ['Iggy Pop', 'anonymous'])
+
+    @staticmethod
+    def peak(consume, data):
+        tracemalloc.start()
+        try:
+            consume(io.BytesIO(data))
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    def test_records_released(self):
+        body = b''.join(b'<item n="%d"><v>%d</v></item>' % (i, i)
+                        for i in range(20000))
+        data = b'<root><items>' + body + b'</items></root>'
+        streamed = self.peak(lambda source: sum(
+            int(v) for n, v in iterxml(source, 'item', ['@n', 'v'])), data)
+        whole = self.peak(ElementTree.parse, data)
+        self.assertLess(streamed * 4, whole)
+
+    def test_siblings_released(self):
+        def osm(count):
+            return b'<osm>' + b''.join(
+                b'<node id="%d"/><way id="%d"><nd ref="%d"/></way>'
+                % (i, i, i) for i in range(count)) + b'</osm>'
+
+        def consume(source):
+            for record in iterxml(source, 'node', '@id'):
+                pass
+
+        small = self.peak(consume, osm(2000))
+        large = self.peak(consume, osm(20000))
+        self.assertLess(large, small * 2)
+
+    def test_record_cleared(self):
+        records = iterxml(io.BytesIO(FEED), 'entry')
+        element = next(records).unbox()._element
+        next(records)
+        self.assertEqual(len(element), 0)
+        self.assertEqual(element.attrib, {})
+
+
+if __name__ == '__main__':
+    unittest.main()